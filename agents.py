@@ -0,0 +1,319 @@
+from tester import Trial, silence_output
+from robot import Robot
+import argparse
+import asyncio
+import itertools
+import json
+
+# Line-delimited JSON protocol between the tester and out-of-process robots.
+# Many sessions share one connection; every message names its session.
+#
+#   tester -> agent  {"type": "start", "session": id, "maze_dim": n,
+#                     "seed": s, "params": {...}}
+#   tester -> agent  {"type": "sense", "session": id, "sensors": [l, f, r]}
+#   agent -> tester  {"type": "move", "session": id, "rotation": r,
+#                     "movement": m}   (both "Reset" to end the first run)
+#   tester -> agent  {"type": "end", "session": id}
+#
+# Only "sense" is answered. A session has at most one request in flight, but
+# requests of different sessions are pipelined on the connection.
+
+
+def encode(message):
+    '''
+    Returns a protocol message as one line of bytes.
+    '''
+    return (json.dumps(message) + '\n').encode('utf-8')
+
+
+def decode(line):
+    '''
+    Returns the protocol message held in one line of bytes.
+    '''
+    return json.loads(line.decode('utf-8'))
+
+
+class AgentConnection(object):
+    '''
+    The tester's end of a connection to one agent process. Replies are routed
+    back to the session that is waiting on them, so sessions can issue their
+    requests independently of each other.
+    '''
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.waiting = {}
+        self.closed = False
+        self.listener = asyncio.ensure_future(self.listen())
+
+    async def listen(self):
+        '''
+        Reads replies until the agent disconnects, then fails every session
+        still waiting on one.
+        '''
+        try:
+            while True:
+                try:
+                    line = await self.reader.readline()
+                except ConnectionError:
+                    # Reset by an agent that crashed.
+                    break
+                if not line:
+                    break
+                message = decode(line)
+                future = self.waiting.pop(message['session'], None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        finally:
+            self.closed = True
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('Agent disconnected.'))
+            self.waiting.clear()
+
+    def send(self, message):
+        '''
+        Sends a message that needs no reply.
+        '''
+        self.writer.write(encode(message))
+
+    async def request(self, message):
+        '''
+        Sends a message and waits for the agent's reply to its session.
+        '''
+        if self.closed:
+            raise ConnectionError('Agent disconnected.')
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[message['session']] = future
+        self.send(message)
+        await self.writer.drain()
+        return await future
+
+    def forget(self, session):
+        '''
+        Stops waiting for a reply to the session, e.g. after a timeout.
+        '''
+        self.waiting.pop(session, None)
+
+
+async def run_session(agent, session, maze_file, seed, params, timeout):
+    '''
+    Runs one trial against an agent. Each move must arrive within timeout
+    seconds. Returns the same results dictionary as tester.run_trial, with an
+    'error' entry when the session was cut short.
+    '''
+    trial = Trial(maze_file)
+    results = {'maze': maze_file, 'seed': seed, 'params': params}
+    agent.send({'type': 'start', 'session': session,
+                'maze_dim': trial.maze.dim, 'seed': seed, 'params': params})
+    try:
+        while not trial.finished:
+            if not trial.tick():
+                continue
+            reply = await asyncio.wait_for(
+                agent.request({'type': 'sense', 'session': session,
+                               'sensors': trial.sensing()}),
+                timeout)
+            trial.step(reply['rotation'], reply['movement'])
+    except asyncio.TimeoutError:
+        agent.forget(session)
+        results['error'] = 'timeout'
+    except ConnectionError as error:
+        results['error'] = str(error)
+    if not agent.closed:
+        agent.send({'type': 'end', 'session': session})
+
+    results['runtimes'] = trial.runtimes
+    results['score'] = trial.score() if 'error' not in results else None
+    return results
+
+
+class TesterServer(object):
+    '''
+    Serves maze sessions to agents connecting on a local socket. Every agent
+    runs up to `concurrency` sessions at once, taken from a shared queue of
+    (maze, seed, robot parameters) trials.
+    '''
+    def __init__(self, trials, concurrency=64, timeout=5.0, on_result=None,
+                 max_attempts=3):
+        self.trials = list(trials)
+        self.queue = None
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.on_result = on_result
+        self.max_attempts = max_attempts
+        self.attempts = [0] * len(self.trials)
+        self.results = []
+        self.sessions = itertools.count()
+        self.workers = set()
+
+    async def handle_agent(self, reader, writer):
+        '''
+        Runs sessions against a newly connected agent until every trial is
+        done or the agent disconnects. Trials interrupted by a disconnect go
+        back on the queue for the agents still connected.
+
+        A trial that has been interrupted before runs alone on its agent, so
+        that if the agent goes away again the trial is known to be the cause.
+        After max_attempts interrupted runs the trial is recorded with its
+        error instead of being queued again.
+        '''
+        agent = AgentConnection(reader, writer)
+        turns = asyncio.Condition()
+        state = {'running': 0, 'alone': False}
+
+        async def worker():
+            # A dead connection takes no new trials.
+            while not agent.closed:
+                number = await self.queue.get()
+                try:
+                    alone = self.attempts[number] > 0
+                    async with turns:
+                        await turns.wait_for(lambda: not state['alone'])
+                        if alone:
+                            state['alone'] = True
+                            await turns.wait_for(lambda: state['running'] == 0)
+                        state['running'] += 1
+                    try:
+                        if agent.closed:
+                            # Went away while this worker was waiting.
+                            self.queue.put_nowait(number)
+                            break
+                        results = await run_session(agent, next(self.sessions),
+                                                    *self.trials[number],
+                                                    timeout=self.timeout)
+                    finally:
+                        async with turns:
+                            state['running'] -= 1
+                            if alone:
+                                state['alone'] = False
+                            turns.notify_all()
+
+                    if 'error' in results and agent.closed:
+                        # Cut short by the agent going away; leave the trial
+                        # to an agent that is still connected, unless it has
+                        # already brought down too many.
+                        self.attempts[number] += 1
+                        if self.attempts[number] < self.max_attempts:
+                            self.queue.put_nowait(number)
+                            continue
+                    self.results.append(results)
+                    if self.on_result is not None:
+                        self.on_result(results)
+                finally:
+                    self.queue.task_done()
+
+        workers = [asyncio.ensure_future(worker())
+                   for i in range(self.concurrency)]
+        self.workers.update(workers)
+        try:
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.workers.difference_update(workers)
+            writer.close()
+
+    async def serve(self, path):
+        '''
+        Listens on the Unix socket at path until every trial has been run,
+        and returns the results.
+        '''
+        self.queue = asyncio.Queue()
+        for number in range(len(self.trials)):
+            self.queue.put_nowait(number)
+        server = await asyncio.start_unix_server(self.handle_agent, path)
+        try:
+            await self.queue.join()
+        finally:
+            # Workers idle on the empty queue are no longer needed.
+            for worker in list(self.workers):
+                worker.cancel()
+            server.close()
+            await server.wait_closed()
+        return self.results
+
+
+async def serve_robot(path, robot_class=Robot):
+    '''
+    Connects to a tester server at path and answers its sessions with
+    instances of robot_class, one per session, until the server hangs up.
+    '''
+    reader, writer = await asyncio.open_unix_connection(path)
+    robots = {}
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = decode(line)
+            session = message['session']
+            if message['type'] == 'start':
+                robots[session] = robot_class(message['maze_dim'],
+                                              message['seed'],
+                                              **message['params'])
+            elif message['type'] == 'sense':
+                rotation, movement = robots[session].next_move(
+                    message['sensors'])
+                writer.write(encode({'type': 'move', 'session': session,
+                                     'rotation': rotation,
+                                     'movement': movement}))
+                await writer.drain()
+            elif message['type'] == 'end':
+                robots.pop(session, None)
+    finally:
+        # Hang up at once, even when a robot raises.
+        writer.close()
+
+
+if __name__ == '__main__':
+    '''
+    This script runs either side of the agent protocol. The tester side,
+
+        python agents.py serve /tmp/maze.sock results.jsonl test_maze_*.txt
+
+    runs the trials against every agent that connects and appends each
+    result to the results file. The agent side,
+
+        python agents.py robot /tmp/maze.sock
+
+    serves the sessions with the Robot from robot.py.
+    '''
+    parser = argparse.ArgumentParser(description='Agent protocol endpoints.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    serve = commands.add_parser('serve', help='run the tester server')
+    serve.add_argument('socket', help='path of the Unix socket to listen on')
+    serve.add_argument('results', help='append-only results file')
+    serve.add_argument('mazes', nargs='+', help='maze description files')
+    serve.add_argument('--seeds', type=int, default=1,
+                       help='number of seeds per maze')
+    serve.add_argument('--seed', type=int, default=0, help='first seed')
+    serve.add_argument('--concurrency', type=int, default=64,
+                       help='sessions run at once per agent')
+    serve.add_argument('--timeout', type=float, default=5.0,
+                       help='seconds allowed for each move')
+    serve.add_argument('--max-attempts', type=int, default=3,
+                       help='agent disconnects a trial may cause before it '
+                            'is recorded as failed')
+
+    agent = commands.add_parser('robot', help='serve sessions with the Robot')
+    agent.add_argument('socket', help='path of the tester server socket')
+    args = parser.parse_args()
+
+    # Per-move chatter from the tester and robot would drown the output.
+    silence_output()
+
+    if args.command == 'serve':
+        trials = [(maze_file, seed, {}) for maze_file in args.mazes
+                  for seed in range(args.seed, args.seed + args.seeds)]
+        with open(args.results, 'a') as f_out:
+            def record(results):
+                f_out.write(json.dumps(results, sort_keys=True) + '\n')
+                f_out.flush()
+            server = TesterServer(trials, args.concurrency, args.timeout,
+                                  record, args.max_attempts)
+            asyncio.run(server.serve(args.socket))
+    else:
+        asyncio.run(serve_robot(args.socket))
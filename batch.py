@@ -0,0 +1,223 @@
+from tester import run_trial, silence_output
+from sweep import parse_grid, make_configs
+from catalog import Catalog, add_selection_arguments, select_from_arguments
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import argparse
+import json
+import multiprocessing
+import os
+
+# Queue on which a worker process reports the key of each trial it starts.
+started_queue = None
+
+
+def trial_key(maze_file, seed, params):
+    '''
+    Returns the key identifying a trial: its maze, seed and robot
+    configuration, with the configuration in a canonical form.
+    '''
+    return (maze_file, seed, json.dumps(params, sort_keys=True))
+
+
+def completed_keys(results_file):
+    '''
+    Returns the set of trial keys already recorded in a results file. A line
+    left incomplete by a crash is ignored, so that trial is run again.
+    '''
+    keys = set()
+    if not os.path.exists(results_file):
+        return keys
+    with open(results_file) as f_in:
+        for line in f_in:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            keys.add(trial_key(result['maze'], result['seed'], result['params']))
+    return keys
+
+
+def work_list(mazes, seeds, configs, shard=0, shards=1):
+    '''
+    Returns the (maze, seed, robot parameters) trials of the batch that belong
+    to the given shard. Trials are numbered in a fixed order and shard i of n
+    takes every trial whose number is i modulo n, so several machines can
+    share a batch by running the same command with different shards. Maze
+    paths are made absolute, so that a batch resumed from another directory,
+    or with its mazes taken from a catalog, finds the trials already done.
+    '''
+    trials = [(os.path.abspath(maze_file), seed, params)
+              for maze_file in mazes for seed in seeds for params in configs]
+    return [trial for number, trial in enumerate(trials)
+            if number % shards == shard]
+
+
+def failed_result(trial, error):
+    '''
+    Returns the result recorded for a trial that could not be run.
+    '''
+    maze_file, seed, params = trial
+    return {'maze': maze_file, 'seed': seed, 'params': params,
+            'runtimes': [], 'score': None, 'error': error}
+
+
+def init_worker(started):
+    '''
+    Sets up a worker process: discards its output and keeps the queue on
+    which it reports the trials it starts.
+    '''
+    global started_queue
+    silence_output()
+    started_queue = started
+
+
+def run_task(trial):
+    '''
+    Runs one (maze, seed, robot parameters) trial in a worker process. A trial
+    that raises gives a result with an 'error' entry and no score, so that it
+    is recorded, and skipped on restart, like any other.
+    '''
+    if started_queue is not None:
+        started_queue.put(trial_key(*trial))
+    maze_file, seed, params = trial
+    try:
+        return run_trial(maze_file, seed, robot_params=params)
+    except Exception as error:
+        return failed_result(trial, '{}: {}'.format(type(error).__name__, error))
+
+
+def run_pool(trials, workers, record):
+    '''
+    Runs trials on a new process pool, passing each result to record as soon
+    as it is done. Returns the trials left unfinished because a worker
+    process died, and those of them that had started, one of which the
+    worker died on.
+    '''
+    started = multiprocessing.SimpleQueue()
+    running = set()
+    finished = set()
+    executor = ProcessPoolExecutor(workers, initializer=init_worker,
+                                   initargs=(started,))
+    try:
+        futures = [executor.submit(run_task, trial) for trial in trials]
+        for future in as_completed(futures):
+            # Drained as results come in, so that workers never block on it.
+            while not started.empty():
+                running.add(started.get())
+            result = future.result()
+            record(result)
+            finished.add(trial_key(result['maze'], result['seed'],
+                                   result['params']))
+    except BrokenProcessPool:
+        while not started.empty():
+            running.add(started.get())
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+    unfinished = [trial for trial in trials if trial_key(*trial) not in finished]
+    suspects = [trial for trial in unfinished if trial_key(*trial) in running]
+    return unfinished, suspects
+
+
+def run_batch(trials, results_file, workers=None):
+    '''
+    Runs the trials not yet recorded in results_file on a process pool, and
+    appends each result to the file as a line of JSON as soon as it is done.
+    Returns the number of trials run.
+
+    If a worker process dies, the trials it may have been running are run
+    again one at a time in a pool of their own, and the rest of the batch on
+    a new pool. A trial that kills its worker even on its own is recorded
+    with an error.
+    '''
+    done = completed_keys(results_file)
+    pending = [trial for trial in trials if trial_key(*trial) not in done]
+    if not pending:
+        return 0
+
+    # Finish off a line cut short by a crash before appending.
+    cut_short = False
+    if os.path.exists(results_file) and os.path.getsize(results_file) > 0:
+        with open(results_file, 'rb') as f_in:
+            f_in.seek(-1, os.SEEK_END)
+            cut_short = f_in.read(1) != b'\n'
+
+    with open(results_file, 'a') as f_out:
+        if cut_short:
+            f_out.write('\n')
+
+        def record(result):
+            f_out.write(json.dumps(result, sort_keys=True) + '\n')
+            f_out.flush()
+            os.fsync(f_out.fileno())
+
+        remaining = pending
+        while remaining:
+            unfinished, suspects = run_pool(remaining, workers, record)
+            if unfinished and len(unfinished) == len(remaining) and not suspects:
+                raise Exception('Worker processes died before running any trial!')
+            if unfinished:
+                print('A worker process died; {} trials left to run.'.format(
+                    len(unfinished)))
+            for trial in suspects:
+                if run_pool([trial], 1, record)[0]:
+                    record(failed_result(trial, 'worker process died'))
+            remaining = [trial for trial in unfinished if trial not in suspects]
+    return len(pending)
+
+
+if __name__ == '__main__':
+    '''
+    This script runs a batch of trials over mazes, seeds and robot
+    configurations, e.g.
+
+        python batch.py results.jsonl test_maze_*.txt --seeds 100 --shard 0/4
+
+    or, with mazes taken from a catalog built by catalog.py,
+
+        python batch.py results.jsonl --catalog corpus.db --dim 64 --seeds 100
+
+    Each finished trial is appended to the results file. Re-running the same
+    command after a crash skips the trials already in the file.
+    '''
+    parser = argparse.ArgumentParser(description='Run a batch of trials.')
+    parser.add_argument('results', help='append-only results file')
+    parser.add_argument('mazes', nargs='*', help='maze description files')
+    parser.add_argument('--catalog', default=None,
+                        help='take the mazes matching the options below from '
+                             'this catalog database')
+    parser.add_argument('--param', action='append', default=[],
+                        help='robot parameter and values, '
+                             'e.g. max_actions=500,700,900')
+    parser.add_argument('--seeds', type=int, default=1,
+                        help='number of seeds per maze and configuration')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='first seed')
+    parser.add_argument('--shard', default='0/1',
+                        help='shard of the batch to run, as index/count')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes')
+    add_selection_arguments(parser)
+    args = parser.parse_args()
+
+    mazes = list(args.mazes)
+    if args.catalog is not None:
+        catalog = Catalog(args.catalog)
+        try:
+            mazes.extend(select_from_arguments(catalog, args))
+        finally:
+            catalog.close()
+    if not mazes:
+        parser.error('no mazes given')
+
+    shard, shards = [int(part) for part in args.shard.split('/')]
+    if not 0 <= shard < shards:
+        parser.error('shard index must be between 0 and count - 1')
+
+    configs = make_configs(parse_grid(args.param))
+    seeds = range(args.seed, args.seed + args.seeds)
+    trials = work_list(mazes, seeds, configs, shard, shards)
+    count = run_batch(trials, args.results, args.workers)
+    print('Ran {} of {} trials in shard {}; results in {}.'.format(
+        count, len(trials), args.shard, args.results))
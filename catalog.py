@@ -0,0 +1,217 @@
+from maze import Maze
+import argparse
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+schema = '''
+CREATE TABLE IF NOT EXISTS mazes (
+    hash TEXT PRIMARY KEY,
+    dim INTEGER NOT NULL,
+    shortest_path INTEGER,
+    dead_ends INTEGER NOT NULL,
+    branching_factor REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL REFERENCES mazes (hash),
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bad_files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mazes_by_dim ON mazes (dim, shortest_path);
+CREATE INDEX IF NOT EXISTS files_by_hash ON files (hash);
+'''
+
+
+def maze_hash(maze):
+    '''
+    Returns a hash of a maze's layout, so that identical mazes match however
+    their files are named or formatted.
+    '''
+    digest = hashlib.sha1(str(maze.dim).encode('ascii'))
+    digest.update(np.asarray(maze.walls, dtype=np.uint8).tobytes())
+    return digest.hexdigest()
+
+
+def maze_files(paths):
+    '''
+    Expands a list of maze files and directories into the absolute paths of
+    maze files; directories are searched recursively for .txt files.
+    '''
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith('.txt'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+class Catalog(object):
+    '''
+    SQLite index of a maze corpus. Each distinct maze layout is stored once,
+    keyed by its hash, with its dimension and metrics; each file is stored
+    with the hash of the maze it holds and the size and modification time it
+    had when it was read, so that only new or changed files are parsed again.
+    Files that failed to parse are kept apart in the same way.
+    Files are stored by absolute path, so the catalog can be updated and
+    queried from any directory.
+    '''
+    def __init__(self, db_path):
+        '''
+        db_path: file path for the SQLite database (string)
+        '''
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(schema)
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, paths):
+        '''
+        Indexes the given maze files and directories, reading only files that
+        are new or have changed since they were last indexed, and drops files
+        that no longer exist. Paths that cannot be read as mazes are reported
+        and left out of the index; bad files are remembered, and not read
+        again until they change. Returns the number of files read.
+        '''
+        cursor = self.connection.cursor()
+        read = 0
+        with self.connection:
+            for path in maze_files(paths):
+                try:
+                    stat = os.stat(path)
+                except OSError as error:
+                    print('Skipping {}: {}'.format(path, error))
+                    continue
+                row = cursor.execute('SELECT mtime, size FROM files WHERE path = ?',
+                                     (path,)).fetchone()
+                if row == (stat.st_mtime, stat.st_size):
+                    continue
+                row = cursor.execute('SELECT mtime, size FROM bad_files '
+                                     'WHERE path = ?', (path,)).fetchone()
+                if row == (stat.st_mtime, stat.st_size):
+                    continue
+
+                try:
+                    maze = Maze(path)
+                except Exception as error:
+                    # One bad file should not cost the rest of the update, and
+                    # is not read again until it changes.
+                    print('Skipping {}: {}'.format(path, error))
+                    cursor.execute('DELETE FROM files WHERE path = ?', (path,))
+                    cursor.execute('INSERT OR REPLACE INTO bad_files '
+                                   'VALUES (?, ?, ?)',
+                                   (path, stat.st_mtime, stat.st_size))
+                    continue
+                cursor.execute('DELETE FROM bad_files WHERE path = ?', (path,))
+                key = maze_hash(maze)
+                if cursor.execute('SELECT 1 FROM mazes WHERE hash = ?',
+                                  (key,)).fetchone() is None:
+                    metrics = maze.metrics()
+                    cursor.execute('INSERT INTO mazes VALUES (?, ?, ?, ?, ?)',
+                                   (key, metrics['dim'], metrics['shortest_path'],
+                                    metrics['dead_ends'],
+                                    metrics['branching_factor']))
+                cursor.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                               (path, key, stat.st_mtime, stat.st_size))
+                read += 1
+
+            for table in ('files', 'bad_files'):
+                gone = [(path,) for (path,)
+                        in cursor.execute('SELECT path FROM ' + table)
+                        if not os.path.exists(path)]
+                cursor.executemany('DELETE FROM ' + table + ' WHERE path = ?',
+                                   gone)
+            cursor.execute('DELETE FROM mazes WHERE hash NOT IN '
+                           '(SELECT hash FROM files)')
+        return read
+
+    def select(self, dim=None, min_path=None, max_path=None,
+               min_dead_ends=None, max_dead_ends=None):
+        '''
+        Returns the absolute paths of the indexed mazes matching every given
+        bound, one file per distinct maze, sorted by path. Path bounds apply
+        to the shortest path length from the start to the goal.
+        '''
+        bounds = [('mazes.dim = ?', dim),
+                  ('mazes.shortest_path >= ?', min_path),
+                  ('mazes.shortest_path <= ?', max_path),
+                  ('mazes.dead_ends >= ?', min_dead_ends),
+                  ('mazes.dead_ends <= ?', max_dead_ends)]
+        clauses = [clause for clause, value in bounds if value is not None]
+        values = [value for clause, value in bounds if value is not None]
+
+        query = ('SELECT MIN(files.path) FROM files JOIN mazes '
+                 'ON files.hash = mazes.hash')
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' GROUP BY mazes.hash ORDER BY MIN(files.path)'
+        return [path for (path,) in self.connection.execute(query, values)]
+
+
+def add_selection_arguments(parser):
+    '''
+    Adds the options that select mazes from a catalog to a command line
+    parser.
+    '''
+    parser.add_argument('--dim', type=int, default=None,
+                        help='maze dimension')
+    parser.add_argument('--min-path', type=int, default=None,
+                        help='minimum shortest path length')
+    parser.add_argument('--max-path', type=int, default=None,
+                        help='maximum shortest path length')
+    parser.add_argument('--min-dead-ends', type=int, default=None,
+                        help='minimum number of dead ends')
+    parser.add_argument('--max-dead-ends', type=int, default=None,
+                        help='maximum number of dead ends')
+
+
+def select_from_arguments(catalog, args):
+    '''
+    Returns the catalog's mazes matching the options added by
+    add_selection_arguments.
+    '''
+    return catalog.select(args.dim, args.min_path, args.max_path,
+                          args.min_dead_ends, args.max_dead_ends)
+
+
+if __name__ == '__main__':
+    '''
+    This script maintains and queries a maze corpus catalog, e.g.
+
+        python catalog.py corpus.db update mazes/
+        python catalog.py corpus.db list --dim 64 --min-path 200
+    '''
+    parser = argparse.ArgumentParser(description='Maze corpus catalog.')
+    parser.add_argument('db', help='catalog database file')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    update = commands.add_parser('update', help='index new or changed mazes')
+    update.add_argument('paths', nargs='+', help='maze files or directories')
+
+    listing = commands.add_parser('list', help='list matching maze files')
+    add_selection_arguments(listing)
+    args = parser.parse_args()
+
+    catalog = Catalog(args.db)
+    try:
+        if args.command == 'update':
+            read = catalog.update(args.paths)
+            print('Indexed {} new or changed files.'.format(read))
+        else:
+            for path in select_from_arguments(catalog, args):
+                print(path)
+    finally:
+        catalog.close()
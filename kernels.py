@@ -0,0 +1,110 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Inner loops of sensing, movement and flood fill, written over a maze's
+# uint8 walls array so that Numba can compile them. Without Numba the same
+# functions run as plain Python. Directions are given as the wall bit to test
+# and the (x, y) step to take, as in Maze.
+
+
+def _dist_to_wall(walls, x, y, bit, dx, dy):
+    '''
+    Returns the number of open cells from (x, y) to the nearest wall in the
+    direction of bit.
+    '''
+    distance = 0
+    while walls[x, y] & bit:
+        distance += 1
+        x += dx
+        y += dy
+    return distance
+
+
+def _sense(walls, x, y, heading):
+    '''
+    Returns the distances to the walls on the left, front and right of a robot
+    at (x, y), with heading given as 0, 1, 2 or 3 for up, right, down or left.
+    Taking all three readings in one call saves two calls per time step.
+    '''
+    bits = (1, 2, 4, 8)
+    steps_x = (0, 1, 0, -1)
+    steps_y = (1, 0, -1, 0)
+    left = (heading + 3) % 4
+    front = heading
+    right = (heading + 1) % 4
+    return (_dist_to_wall(walls, x, y, bits[left], steps_x[left], steps_y[left]),
+            _dist_to_wall(walls, x, y, bits[front], steps_x[front], steps_y[front]),
+            _dist_to_wall(walls, x, y, bits[right], steps_x[right], steps_y[right]))
+
+
+def _move(walls, x, y, bit, dx, dy, steps):
+    '''
+    Moves up to steps cells from (x, y) in the direction of bit, stopping at
+    the first wall. Returns the new x and y, and whether a wall stopped the
+    movement short.
+    '''
+    while steps > 0:
+        if not walls[x, y] & bit:
+            return x, y, True
+        x += dx
+        y += dy
+        steps -= 1
+    return x, y, False
+
+
+def _flood_fill(walls, sources):
+    '''
+    Returns the number of steps from every cell to the nearest source cell,
+    or -1 for unreachable cells. sources is an (n, 2) array of cells.
+    '''
+    dim_x, dim_y = walls.shape
+    field = np.full((dim_x, dim_y), -1, np.int64)
+    queue_x = np.empty(dim_x * dim_y, np.int64)
+    queue_y = np.empty(dim_x * dim_y, np.int64)
+    bits = (1, 2, 4, 8)
+    steps_x = (0, 1, 0, -1)
+    steps_y = (1, 0, -1, 0)
+
+    tail = 0
+    for i in range(sources.shape[0]):
+        x, y = sources[i, 0], sources[i, 1]
+        if field[x, y] < 0:
+            field[x, y] = 0
+            queue_x[tail] = x
+            queue_y[tail] = y
+            tail += 1
+
+    head = 0
+    while head < tail:
+        x, y = queue_x[head], queue_y[head]
+        head += 1
+        for k in range(4):
+            if walls[x, y] & bits[k]:
+                x2 = x + steps_x[k]
+                y2 = y + steps_y[k]
+                if field[x2, y2] < 0:
+                    field[x2, y2] = field[x, y] + 1
+                    queue_x[tail] = x2
+                    queue_y[tail] = y2
+                    tail += 1
+    return field
+
+
+if njit is not None:
+    jit = True
+    # Rebound first so that the compiled _sense calls the compiled walk.
+    _dist_to_wall = njit(cache=True)(_dist_to_wall)
+    dist_to_wall = _dist_to_wall
+    sense = njit(cache=True)(_sense)
+    move = njit(cache=True)(_move)
+    flood_fill = njit(cache=True)(_flood_fill)
+else:
+    jit = False
+    dist_to_wall = _dist_to_wall
+    sense = _sense
+    move = _move
+    flood_fill = _flood_fill
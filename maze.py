@@ -1,4 +1,5 @@
 import numpy as np
+import kernels
 
 class Maze(object):
     def __init__(self, filename):
@@ -9,21 +10,21 @@ class Maze(object):
             0 if there is a wall and 1 if there is no wall. The 1s register
             corresponds with a square's top edge, 2s register the right edge,
             4s register the bottom edge, and 8s register the left edge. (numpy
-            array)
+            uint8 array)
 
         The initialization function also performs some consistency checks for
         wall positioning.
         '''
-        with open(filename, 'rb') as f_in:
+        with open(filename, 'r') as f_in:
 
             # First line should be an integer with the maze dimensions
-            self.dim = int(f_in.next())
+            self.dim = int(next(f_in))
 
             # Subsequent lines describe the permissability of walls
             walls = []
             for line in f_in:
-                walls.append(map(int,line.split(',')))
-            self.walls = np.array(walls)
+                walls.append(list(map(int, line.split(','))))
+            self.walls = np.array(walls, dtype=np.uint8)
 
         # Perform validation on maze
         # Maze dimensions
@@ -44,17 +45,29 @@ class Maze(object):
             for x in range(self.dim):
                 if (self.walls[x,y] & 1 != 0) != (self.walls[x,y+1] & 4 != 0):
                     wall_errors.append([(x,y), 'h'])
+        # outer walls, which sensing and movement rely on to stay in the maze
+        for i in range(self.dim):
+            for cell, bit in [((0,i), 8), ((self.dim-1,i), 2),
+                              ((i,0), 4), ((i,self.dim-1), 1)]:
+                if self.walls[cell] & bit:
+                    wall_errors.append([cell, bit])
 
         if wall_errors:
             for cell, wall_type in wall_errors:
-                if wall_type == 'v':
+                if wall_type in (1, 2, 4, 8):
+                    side = {1: 'top', 2: 'right', 4: 'bottom', 8: 'left'}[wall_type]
+                    print('Missing outer wall on the {} of {}'.format(side, cell))
+                elif wall_type == 'v':
                     cell2 = (cell[0]+1, cell[1])
-                    print 'Inconsistent vertical wall betweeen {} and {}'.format(cell, cell2)
+                    print('Inconsistent vertical wall betweeen {} and {}'.format(cell, cell2))
                 else:
                     cell2 = (cell[0], cell[1]+1)
-                    print 'Inconsistent horizontal wall betweeen {} and {}'.format(cell, cell2)
+                    print('Inconsistent horizontal wall betweeen {} and {}'.format(cell, cell2))
             raise Exception('Consistency errors found in wall specifications!')
 
+        # Distance fields computed so far, keyed by their set of source cells.
+        self._fields = {}
+
 
     def is_permissible(self, cell, direction):
         """
@@ -68,7 +81,7 @@ class Maze(object):
         try:
             return (self.walls[tuple(cell)] & dir_int[direction] != 0)
         except:
-            print 'Invalid direction provided!'
+            print('Invalid direction provided!')
 
 
     def dist_to_wall(self, cell, direction):
@@ -77,18 +90,131 @@ class Maze(object):
         wall in the indicated direction. Cell is input as a list. Directions
         may be input as a single letter 'u', 'r', 'd', 'l', or complete words
         'up', 'right', 'down', 'left'.
+
+        The walk runs in a compiled kernel when Numba is installed.
         """
+        dir_int = {'u': 1, 'r': 2, 'd': 4, 'l': 8,
+                   'up': 1, 'right': 2, 'down': 4, 'left': 8}
         dir_move = {'u': [0, 1], 'r': [1, 0], 'd': [0, -1], 'l': [-1, 0],
                     'up': [0, 1], 'right': [1, 0], 'down': [0, -1], 'left': [-1, 0]}
 
-        sensing = True
+        if direction not in dir_int:
+            print('Invalid direction provided!')
+            return 0
+        return kernels.dist_to_wall(self.walls, cell[0], cell[1],
+                                    dir_int[direction],
+                                    dir_move[direction][0],
+                                    dir_move[direction][1])
+
+
+    def goal_cells(self):
+        """
+        Returns the four cells at the centre of the maze that make up the goal
+        area, as a list of (x, y) tuples.
+        """
+        goal_bounds = [self.dim // 2 - 1, self.dim // 2]
+        return [(x, y) for x in goal_bounds for y in goal_bounds]
+
+
+    def distance_field(self, sources):
+        """
+        Returns a numpy array holding, for every cell, the number of steps on
+        the shortest path from the nearest of the given source cells. Sources
+        are input as an iterable of cells; unreachable cells are set to -1.
+
+        With Numba installed the field is filled by a compiled breadth-first
+        search; otherwise it is grown as a numpy wavefront over the whole
+        grid, one step per iteration. Either way it is cached on the maze so
+        that repeated queries for the same set of sources are free. The
+        returned array is read-only. Sources outside the maze raise an
+        IndexError.
+        """
+        key = frozenset(tuple(cell) for cell in sources)
+        for cell in key:
+            # The compiled search does not check its bounds, and numpy would
+            # wrap negative indices, so bad sources are caught here.
+            if len(cell) != 2 or not all(0 <= i < self.dim for i in cell):
+                raise IndexError('Source cell {} is outside the maze!'.format(cell))
+        if key in self._fields:
+            return self._fields[key]
+
+        if kernels.jit:
+            cells = np.array(sorted(key), dtype=np.int64).reshape(-1, 2)
+            field = kernels.flood_fill(self.walls, cells)
+            field.flags.writeable = False
+            self._fields[key] = field
+            return field
+
+        # Passage masks, one per direction of travel.
+        open_up = self.walls & 1 != 0
+        open_right = self.walls & 2 != 0
+        open_down = self.walls & 4 != 0
+        open_left = self.walls & 8 != 0
+
+        field = np.full((self.dim, self.dim), -1, dtype=np.int64)
+        frontier = np.zeros((self.dim, self.dim), dtype=bool)
+        for cell in key:
+            frontier[cell] = True
+
         distance = 0
-        curr_cell = list(cell) # make copy to preserve original
-        while sensing:
-            if self.is_permissible(curr_cell, direction):
-                distance += 1
-                curr_cell[0] += dir_move[direction][0]
-                curr_cell[1] += dir_move[direction][1]
-            else:
-                sensing = False
-        return distance
\ No newline at end of file
+        while frontier.any():
+            field[frontier] = distance
+            distance += 1
+
+            reached = np.zeros_like(frontier)
+            reached[:, 1:] |= frontier[:, :-1] & open_up[:, :-1]
+            reached[1:, :] |= frontier[:-1, :] & open_right[:-1, :]
+            reached[:, :-1] |= frontier[:, 1:] & open_down[:, 1:]
+            reached[:-1, :] |= frontier[1:, :] & open_left[1:, :]
+            frontier = reached & (field < 0)
+
+        field.flags.writeable = False
+        self._fields[key] = field
+        return field
+
+
+    def openings(self):
+        """
+        Returns a numpy array with the number of open sides of every cell.
+        """
+        return sum(((self.walls >> bit) & 1).astype(int) for bit in range(4))
+
+
+    def shortest_path_length(self):
+        """
+        Returns the number of single-cell steps on the shortest path from the
+        starting cell (0, 0) to the goal area, or None if the goal cannot be
+        reached.
+        """
+        distance = self.distance_field(self.goal_cells())[0, 0]
+        if distance < 0:
+            return None
+        return int(distance)
+
+
+    def dead_end_count(self):
+        """
+        Returns the number of cells with exactly one open side.
+        """
+        return int((self.openings() == 1).sum())
+
+
+    def branching_factor(self):
+        """
+        Returns the mean number of onward choices (open sides other than the
+        one entered through) over all cells reachable from the starting cell.
+        """
+        reachable = self.distance_field([(0, 0)]) >= 0
+        onward = np.maximum(self.openings()[reachable] - 1, 0)
+        return float(onward.mean())
+
+
+    def metrics(self):
+        """
+        Returns a dictionary of summary metrics describing the maze, used to
+        stratify maze collections and to bound search heuristics.
+        """
+        return {'dim': self.dim,
+                'shortest_path': self.shortest_path_length(),
+                'dead_ends': self.dead_end_count(),
+                'branching_factor': self.branching_factor()}
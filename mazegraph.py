@@ -0,0 +1,137 @@
+import heapq
+
+# Directional bits used by the robot's direction grid, with the (row, column)
+# step each one takes on the robot's map.
+moves = {1: (-1, 0), 2: (0, 1), 4: (1, 0), 8: (0, -1)}
+reverse = {1: 4, 2: 8, 4: 1, 8: 2}
+steps = dict((step, bit) for bit, step in moves.items())
+
+
+class CorridorGraph(object):
+    '''
+    Compressed view of a robot's direction grid. Cells with exactly two
+    openings are corridor cells and are folded into weighted edges; every
+    other mapped cell (junctions, dead ends) and any pinned cell is a node.
+    Unmapped cells act as terminals: edges may end on them, but they have no
+    outgoing edges until they are mapped.
+
+    The graph is kept up to date one cell at a time through add_cell: a new
+    node traces its own edges, and a new corridor cell extends the edges that
+    ended on it, so mapping a corridor costs time linear in its length. The
+    graph assumes mapped neighbours agree on the wall between them.
+    '''
+    def __init__(self, pinned=()):
+        '''
+        pinned: cells that must always be nodes, e.g. search sources (list of
+            (row, column) tuples)
+        '''
+        self.pinned = set(tuple(cell) for cell in pinned)
+        self.openings = {}
+        # node -> {bit: (end cell, list of cells stepped through to the end)}
+        self.edges = {}
+        # cell -> set of (node, bit) edges whose path includes the cell
+        self.through = {}
+
+    def is_node(self, cell):
+        '''
+        Returns True if a mapped cell is a node rather than a corridor cell.
+        '''
+        openings = self.openings[cell]
+        degree = sum(1 for bit in moves if openings & bit)
+        return cell in self.pinned or degree != 2
+
+    def add_cell(self, cell, openings):
+        '''
+        Records the openings of a newly mapped cell and updates the edges
+        affected by it.
+
+        cell: the mapped cell (tuple of ints, i.e. (0, 1))
+        openings: directional bits of the open sides of the cell (int)
+        '''
+        cell = tuple(cell)
+        self.openings[cell] = openings
+
+        if self.is_node(cell):
+            # Edges that stopped at this cell now stop at a node; keep them.
+            self.edges[cell] = {}
+            for bit in moves:
+                if openings & bit:
+                    self.edges[cell][bit] = (cell, [])
+                    self._extend(cell, bit, bit)
+        else:
+            # Edges that stopped at this cell now run on through it, so carry
+            # each one on from here rather than tracing it again from its node.
+            for node, bit in list(self.through.get(cell, ())):
+                end, path = self.edges[node][bit]
+                previous = path[-2] if len(path) > 1 else node
+                arrival = steps[(cell[0] - previous[0], cell[1] - previous[1])]
+                heading = openings & ~reverse[arrival]
+                if heading in moves:
+                    self._extend(node, bit, heading)
+
+    def _extend(self, node, bit, heading):
+        '''
+        Follows the corridor on from the end of the edge leaving node in the
+        direction of bit, setting off in the direction of heading, until it
+        reaches a node, an unmapped cell or node itself again.
+        '''
+        cell, path = self.edges[node][bit]
+        while True:
+            cell = (cell[0] + moves[heading][0], cell[1] + moves[heading][1])
+            path.append(cell)
+            self.through.setdefault(cell, set()).add((node, bit))
+            if cell == node or cell not in self.openings or self.is_node(cell):
+                break
+            # Corridor cell: carry on through its other opening.
+            heading = self.openings[cell] & ~reverse[heading]
+            if heading not in moves:
+                break
+        self.edges[node][bit] = (cell, path)
+
+    def cells(self):
+        '''
+        Returns the mapped cells.
+        '''
+        return self.openings.keys()
+
+    def node_count(self):
+        '''
+        Returns the number of nodes in the compressed graph.
+        '''
+        return len(self.edges)
+
+    def edge_count(self):
+        '''
+        Returns the number of directed edges in the compressed graph.
+        '''
+        return sum(len(edges) for edges in self.edges.values())
+
+    def distances(self, sources):
+        '''
+        Returns a dictionary mapping every cell reachable from the given source
+        cells to its number of steps from the nearest source. Sources should
+        be pinned so that they are nodes of the graph.
+
+        Node distances are found with Dijkstra's algorithm over the weighted
+        edges; corridor cells then take the shorter of the distances through
+        either end of their corridor.
+        '''
+        node_dist = {}
+        heap = [(0, tuple(cell)) for cell in sources]
+        heapq.heapify(heap)
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if node in node_dist:
+                continue
+            node_dist[node] = distance
+            for end, path in self.edges.get(node, {}).values():
+                if end not in node_dist:
+                    heapq.heappush(heap, (distance + len(path), end))
+
+        cell_dist = dict(node_dist)
+        for node, distance in node_dist.items():
+            for end, path in self.edges.get(node, {}).values():
+                for i, cell in enumerate(path):
+                    if cell not in cell_dist or distance + i + 1 < cell_dist[cell]:
+                        cell_dist[cell] = distance + i + 1
+        return cell_dist
@@ -0,0 +1,51 @@
+from tester import run_trial
+from sweep import parse_grid
+import argparse
+import cProfile
+import pstats
+
+if __name__ == '__main__':
+    '''
+    This script re-runs exactly one trial of the robot, given the maze file and
+    the seed reported by tester.py, batch.py or sweep.py, and the robot
+    parameters of a non-default configuration, e.g.
+
+        python replay.py test_maze_01.txt 7 --param max_actions=500
+
+    The trial can optionally be profiled, or drawn with turtle as it runs.
+    '''
+    parser = argparse.ArgumentParser(description='Replay a single trial.')
+    parser.add_argument('maze', help='maze description file')
+    parser.add_argument('seed', type=int,
+                        help='seed for the robot random number generator')
+    parser.add_argument('--param', action='append', default=[],
+                        help='robot parameter and its value, '
+                             'e.g. max_actions=500')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile the trial and print the hottest calls')
+    parser.add_argument('--show', action='store_true',
+                        help='draw the maze and the robot path with turtle')
+    parser.add_argument('--top', type=int, default=25,
+                        help='number of profile entries to print')
+    args = parser.parse_args()
+
+    robot_params = {}
+    for name, values in parse_grid(args.param).items():
+        if len(values) != 1:
+            parser.error('give a single value for {}'.format(name))
+        robot_params[name] = values[0]
+
+    if args.profile:
+        profiler = cProfile.Profile()
+        results = profiler.runcall(run_trial, args.maze, args.seed,
+                                   show_robot=args.show,
+                                   robot_params=robot_params)
+        stats = pstats.Stats(profiler)
+        stats.sort_stats('cumulative').print_stats(args.top)
+    else:
+        results = run_trial(args.maze, args.seed, show_robot=args.show,
+                            robot_params=robot_params)
+
+    print('Maze: {} Seed: {} Params: {} Run times: {} Score: {}'.format(
+        results['maze'], results['seed'], results['params'],
+        results['runtimes'], results['score']))
@@ -1,26 +1,48 @@
 import numpy as np
 import random
+from mazegraph import CorridorGraph
+from tilemap import TiledGrid
 
 class Robot(object):
-    def __init__(self, maze_dim):
+    def __init__(self, maze_dim, seed=None, max_actions=700, coverage=1.0,
+                 warmup_actions=5, tile_size=64):
         """
         Use the initialization function to set up attributes that your robot
         will use to learn and navigate the maze. Some initial attributes are
         provided based on common information, including the size of the maze
         the robot is placed in.
+
+        The seed initializes the robot's own random number generator, so that
+        a trial can be replayed move for move. Without a seed the robot
+        explores differently on every run.
+
+        The remaining arguments tune exploration. The first run ends once the
+        goal has been found and either max_actions moves have been made or the
+        given fraction (coverage) of the maze's cells has been visited. The
+        first warmup_actions exploration moves are single steps.
+
+        The map layers are tiled grids of tile_size x tile_size cells, each
+        tile allocated only once the robot records something inside it.
         """
         self.heading = 'up'
         self.maze_dim = maze_dim
         self.location = [maze_dim - 1, 0]
-        self.goal_area = [self.maze_dim/2 - 1, self.maze_dim/2]
-        self.dir_grid = [[0 for row in range(0, self.maze_dim)] for col in range(0, self.maze_dim)]
-        self.count_grid = [[0 for row in range(1, self.maze_dim + 1)] for col in range(1, self.maze_dim + 1)]
-        self.action_grid = [[0 for row in range(1, self.maze_dim + 1)] for col in range(1, self.maze_dim + 1)]
-        self.model = [[0 for row in range(0, self.maze_dim)] for col in range(0, self.maze_dim)]
+        self.goal_area = [self.maze_dim // 2 - 1, self.maze_dim // 2]
+        self.dir_grid = TiledGrid(self.maze_dim, np.uint8, 0, tile_size)
+        self.count_grid = TiledGrid(self.maze_dim, np.uint8, 0, tile_size)
+        self.action_grid = TiledGrid(self.maze_dim, object, 0, tile_size)
+        self.model = TiledGrid(self.maze_dim, np.int32, 0, tile_size)
+        self.goal_cells = [(x, y) for x in self.goal_area for y in self.goal_area]
+        self.graph = CorridorGraph(pinned=self.goal_cells)
         self.cell_count = 0
         self.action_count = 0
         self.goal_success = False
         self.training = False
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.max_actions = max_actions
+        self.coverage = coverage
+        self.warmup_actions = warmup_actions
 
     def reset(self):
         """
@@ -49,19 +71,24 @@ class Robot(object):
         x, y = self.location
         headings = ['left', 'up', 'right', 'down']
         directions = [8, 1, 2, 4]
+        new_cell = self.dir_grid[x, y] == 0
         
-        if self.dir_grid[x][y] == 0:
+        if new_cell:
             for i in range(len(headings)):
                 if self.heading == headings[i]:
-                    self.dir_grid[x][y] += directions[(i + 2) % 4]
+                    self.dir_grid[x, y] += directions[(i + 2) % 4]
                     if sensors[0] > 0:
-                        self.dir_grid[x][y] += directions[i - 1]
+                        self.dir_grid[x, y] += directions[i - 1]
                     if sensors[1] > 0:
-                        self.dir_grid[x][y] += directions[i]
+                        self.dir_grid[x, y] += directions[i]
                     if sensors[2] > 0:
-                        self.dir_grid[x][y] += directions[(i + 1) % 4]
+                        self.dir_grid[x, y] += directions[(i + 1) % 4]
         
-        self.dir_grid[self.maze_dim - 1][0] = 1
+        self.dir_grid[self.maze_dim - 1, 0] = 1
+
+        # Keep the compressed planning graph in step with the map
+        if new_cell:
+            self.graph.add_cell((x, y), int(self.dir_grid[x, y]))
     
     def breadcrumb(self):
         """
@@ -73,8 +100,8 @@ class Robot(object):
         """
         x, y = self.location
         
-        if self.count_grid[x][y] == 0:
-            self.count_grid[x][y] = 1
+        if self.count_grid[x, y] == 0:
+            self.count_grid[x, y] = 1
             self.cell_count += 1
     
     def update_model(self, location, tune):
@@ -90,7 +117,7 @@ class Robot(object):
         :return: NULL
         """
         x, y = location
-        self.model[x][y] = tune
+        self.model[x, y] = tune
 
     def act_legal(self, location):
         """
@@ -113,13 +140,13 @@ class Robot(object):
         possible = ['up', 'right', 'down', 'left']
         
         for i in range(len(vals)):
-            if self.dir_grid[x][y] in vals[0]:
+            if self.dir_grid[x, y] in vals[0]:
                 actions.extend([possible[0]])
-            if self.dir_grid[x][y] in vals[1]:
+            if self.dir_grid[x, y] in vals[1]:
                 actions.extend([possible[1]])
-            if self.dir_grid[x][y] in vals[2]:
+            if self.dir_grid[x, y] in vals[2]:
                 actions.extend([possible[2]])
-            if self.dir_grid[x][y] in vals[3]:
+            if self.dir_grid[x, y] in vals[3]:
                 actions.extend([possible[3]])
             
             return actions
@@ -129,63 +156,19 @@ class Robot(object):
         Creates ML model for agent based on the first training run recorded
         sensor data and cell information
 
+        The model holds, for each reachable cell, the number of steps to the
+        goal area plus one. It is computed on the robot's corridor graph,
+        where runs of corridor cells are single weighted edges.
+
         :param: NULL
         
         :return: NULL
         """
-        opened = []
         tune = 1
-        trans = [[-1, 0], [0, 1], [1, 0], [0, -1]]
 
-        x = self.goal_area[0]
-        y = self.goal_area[1]
-
-        # Store adjacent directional options based on current cell location
-        opened.append(((x, y), tune))
-        opened.append(((x + trans[2][0],    y + trans[2][1]), tune))
-        opened.append(((x + trans[3][0],    y + trans[3][1]), tune))
-        opened.append(((x + trans[2][0],    y + trans[3][1]), tune))
-        
         # Update agent's model's cell values
-        for cell in opened:
-            self.update_model(cell[0], cell[1])
-
-        # Check all valid possible directions for model agent
-        while self.model[self.maze_dim -1][0] == 0 and len(opened) != 0:
-            location, tune = opened.pop(0)
-            actions = self.act_legal(location)
-
-            if 'up' in actions and self.count_grid[location[0]][location[1]] != 0:
-                x2 = location[0] + trans[0][0]
-                y2 = location[1] + trans[0][1]
-                new_location = x2, y2
-                if self.model[x2][y2] == 0 and self.count_grid[location[0]][location[1]] != 0:
-                    opened.append((new_location, tune + 1))
-                    self.update_model(new_location, tune + 1)
-            
-            if 'right' in actions:
-                x2 = location[0] + trans[1][0]
-                y2 = location[1] + trans[1][1]
-                new_location = x2, y2
-                if self.model[x2][y2] == 0 and self.count_grid[location[0]][location[1]] != 0:
-                    opened.append((new_location, tune + 1))
-                    self.update_model(new_location, tune + 1)
-            
-            if 'down' in actions:
-                x2 = location[0] + trans[2][0]
-                y2 = location[1] + trans[2][1]
-                new_location = x2, y2
-                if self.model[x2][y2] == 0 and self.count_grid[location[0]][location[1]] != 0:
-                    opened.append((new_location, tune + 1))
-                    self.update_model(new_location, tune + 1)
-        
-            if 'left' in actions:
-                x2 = location[0] + trans[3][0]
-                y2 = location[1] + trans[3][1]
-                new_location = x2, y2
-                if self.model[x2][y2] == 0:
-                    opened.append((new_location, tune + 1))
-                    self.update_model(new_location, tune + 1)
+        for cell, steps in self.graph.distances(self.goal_cells).items():
+            self.update_model(cell, steps + tune)
     
     def make_action_grid(self):
         """
@@ -204,12 +187,25 @@ class Robot(object):
         
         trans = [[-1, 0], [0, 1], [1, 0], [0, -1]]
         
-        for i in range(len(self.model)):
-            for j in range(len(self.model[0])):
-                for k in range(len(vals)):
-                    if self.dir_grid[i][j] in vals[k]:
-                        if self.model[i + trans[k][0]][j + trans[k][1]] == self.model[i][j] - 1:
-                            self.action_grid[i][j] = possible[k]
+        # Only mapped cells have directions to act on
+        for i, j in self.graph.cells():
+            for k in range(len(vals)):
+                if self.dir_grid[i, j] in vals[k]:
+                    if self.model[i + trans[k][0], j + trans[k][1]] == self.model[i, j] - 1:
+                        self.action_grid[i, j] = possible[k]
+
+    def choose(self, options):
+        """
+        Picks one of the given options at random using the robot's seeded
+        random number generator. Indexing with random() rather than calling
+        choice() keeps a seeded trajectory the same across Python versions.
+
+        :param options: the options to pick from
+            (a list, i.e. [1, 11, 2])
+
+        :return: one of the options
+        """
+        return options[int(self.rng.random() * len(options))]
 
     def make_action(self, sensors):
         """
@@ -277,45 +273,45 @@ class Robot(object):
 
             # Store actions based on movement options
             if 1 in moves_up:
-                if self.count_grid[x - 1][y] != 1:
+                if self.count_grid[x - 1, y] != 1:
                     actions.extend([1])
             if 2 in moves_up:
-                if self.count_grid[x - 2][y] != 1:
+                if self.count_grid[x - 2, y] != 1:
                     actions.extend([11])
             if 3 in moves_up:
-                if self.count_grid[x - 3][y] != 1:
+                if self.count_grid[x - 3, y] != 1:
                     actions.extend([101])
             if 1 in moves_right:
-                if self.count_grid[x][y + 1] != 1:
+                if self.count_grid[x, y + 1] != 1:
                     actions.extend([2])
             if 2 in moves_right:
-                if self.count_grid[x][y + 2] != 1:
+                if self.count_grid[x, y + 2] != 1:
                     actions.extend([12])
             if 3 in moves_right:
-                if self.count_grid[x][y + 3] != 1:
+                if self.count_grid[x, y + 3] != 1:
                     actions.extend([102])
             if 1 in moves_down:
-                if self.count_grid[x + 1][y] != 1:
+                if self.count_grid[x + 1, y] != 1:
                     actions.extend([3])
             if 2 in moves_down:
-                if self.count_grid[x + 2][y] != 1:
+                if self.count_grid[x + 2, y] != 1:
                     actions.extend([13])
             if 3 in moves_down:
-                if self.count_grid[x + 3][y] != 1:
+                if self.count_grid[x + 3, y] != 1:
                     actions.extend([103])
             if 1 in moves_left:
-                if self.count_grid[x][y - 1] != 1:
+                if self.count_grid[x, y - 1] != 1:
                     actions.extend([4])
             if 2 in moves_left:
-                if self.count_grid[x][y - 2] != 1:
+                if self.count_grid[x, y - 2] != 1:
                     actions.extend([14])
             if 3 in moves_left:
-                if self.count_grid[x][y - 3] != 1:
+                if self.count_grid[x, y - 3] != 1:
                     actions.extend([104])
 
             # Make sure there are valid actions available
             if actions:
-                action = random.choice(actions)
+                action = self.choose(actions)
                 possible_actions = [1, 2, 3, 4, 11, 12, 13, 14, 101, 102, 103, 104]
                 directions = ['up', 'right', 'down', 'left']
 
@@ -325,7 +321,7 @@ class Robot(object):
                         direction = directions[i % 4]
                     if x in self.goal_area and y in self.goal_area:
                         movement = 1
-                    if self.action_count < 5:
+                    if self.action_count < self.warmup_actions:
                         movement = 1
 
                 # Determine rotation value based on direction and heading
@@ -345,7 +341,7 @@ class Robot(object):
                     for j in range(len(possible_moves)):
                         if possible_moves[j] == moves[i]:
                             possible_rotations.append(rotations[i])
-                            rotation = random.choice(possible_rotations)
+                            rotation = self.choose(possible_rotations)
                             movement = 1
             # Robot agent has hit a dead end, turn around
             else:
@@ -357,13 +353,13 @@ class Robot(object):
         if self.training:
             directions = ['up', 'right', 'down', 'left']
             delta = [[-1, 0], [0, 1], [1, 0], [0, -1]]
-            action = self.action_grid[x][y]
+            action = self.action_grid[x, y]
 
             for i in range(len(directions)):
                 # Determine movement value, 1, 2, 3
-                if self.action_grid[x][y] == directions[i]:
-                    if self.action_grid[x + delta[i][0]][y + delta[i][1]] == directions[i]:
-                        if self.action_grid[x + (2 * delta[i][0])][y + (2 * delta[i][1])] == directions[i]:
+                if self.action_grid[x, y] == directions[i]:
+                    if self.action_grid[x + delta[i][0], y + delta[i][1]] == directions[i]:
+                        if self.action_grid[x + (2 * delta[i][0]), y + (2 * delta[i][1])] == directions[i]:
                             movement = 3
                         else:
                             movement = 2
@@ -457,7 +453,6 @@ class Robot(object):
             (a tuple of ints, i.e. [90, 1])
         """
         # Record agent sensor data current location cell
-        max_actions = 700
         x, y = self.location
         self.map_cell(sensors)
         self.breadcrumb()
@@ -469,7 +464,7 @@ class Robot(object):
 
         # Reset run
         if not self.training and self.goal_success:
-            if (self.cell_count >= (self.maze_dim ** 2)) or (self.action_count >= max_actions):
+            if (self.cell_count >= self.coverage * (self.maze_dim ** 2)) or (self.action_count >= self.max_actions):
                 # Training run results
                 print('\nTraining Run Results:\n')
                 print('{}'.format(self.dir_grid))
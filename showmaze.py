@@ -20,7 +20,7 @@ if __name__ == '__main__':
 
     # maze centered on (0,0), squares are 20 units in length.
     sq_size = 20
-    origin = testmaze.dim * sq_size / -2
+    origin = testmaze.dim * sq_size // -2
 
     # iterate through squares one by one to decide where to draw walls
     for x in range(testmaze.dim):
@@ -19,7 +19,7 @@ class ShowRobot(object):
         # Maze is centered on (0,0), squares are 20 units in length.
         self.test_maze = Maze(test_maze)
         self.sq_size = 20
-        self.origin = self.test_maze.dim * self.sq_size / -2
+        self.origin = self.test_maze.dim * self.sq_size // -2
 
         # Intialize the window and drawing turtle.
         self.window = turtle.Screen()
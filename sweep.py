@@ -0,0 +1,150 @@
+from tester import run_trial, silence_output, max_time, train_score_mult
+import argparse
+import itertools
+import multiprocessing
+import random
+
+# Score charged for a trial the robot did not complete. It is above any score
+# a completed trial can reach within the time limit.
+failure_score = max_time * (1 + train_score_mult)
+
+
+def parse_grid(specs):
+    '''
+    Turns parameter specifications of the form name=value,value,... into a
+    dictionary mapping each robot parameter to its list of candidate values.
+    '''
+    grid = {}
+    for spec in specs:
+        name, values = spec.split('=', 1)
+        grid[name] = [float(value) if '.' in value else int(value)
+                      for value in values.split(',')]
+    return grid
+
+
+def make_configs(grid, samples=None, seed=None):
+    '''
+    Returns the robot configurations to evaluate: every combination of the
+    grid values, or, if samples is given, that many distinct combinations
+    drawn at random.
+    '''
+    names = sorted(grid)
+    configs = [dict(zip(names, values))
+               for values in itertools.product(*[grid[name] for name in names])]
+    if samples is not None and samples < len(configs):
+        configs = random.Random(seed).sample(configs, samples)
+    return configs
+
+
+def evaluate(task):
+    '''
+    Runs one trial in a worker process. The task is a tuple of the
+    configuration index, the maze file, the seed and the robot parameters.
+    Returns the configuration index and the score of the trial.
+    '''
+    index, maze_file, seed, params = task
+    score = run_trial(maze_file, seed, robot_params=params)['score']
+    if score is None:
+        score = failure_score
+    return index, score
+
+
+def summarize(scores):
+    '''
+    Returns the distribution of a list of trial scores as a dictionary.
+    '''
+    ordered = sorted(scores)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2.
+    return {'trials': len(ordered),
+            'failures': sum(1 for score in ordered if score >= failure_score),
+            'min': ordered[0],
+            'median': median,
+            'mean': sum(ordered) / float(len(ordered)),
+            'max': ordered[-1]}
+
+
+def sweep(configs, mazes, seeds, workers=None, min_rounds=2, cutoff=1.5):
+    '''
+    Evaluates robot configurations over the given mazes on a process pool.
+
+    Trials are run in rounds, one seed per round across every maze. After
+    min_rounds rounds, a configuration is dropped once its mean score is more
+    than cutoff times the best mean so far. Returns a list with one
+    (configuration, score summary, rounds completed) entry per configuration,
+    best first.
+    '''
+    scores = [[] for config in configs]
+    rounds = [0 for config in configs]
+    active = set(range(len(configs)))
+
+    pool = multiprocessing.Pool(workers, initializer=silence_output)
+    try:
+        for round_number, seed in enumerate(seeds):
+            tasks = [(index, maze_file, seed, configs[index])
+                     for index in sorted(active) for maze_file in mazes]
+            for index, score in pool.imap_unordered(evaluate, tasks):
+                scores[index].append(score)
+            for index in active:
+                rounds[index] += 1
+
+            if round_number + 1 >= min_rounds:
+                means = dict((index, sum(scores[index]) / float(len(scores[index])))
+                             for index in active)
+                best = min(means.values())
+                active = set(index for index in active
+                             if means[index] <= cutoff * best)
+    finally:
+        pool.close()
+        pool.join()
+
+    results = [(configs[index], summarize(scores[index]), rounds[index])
+               for index in range(len(configs))]
+    results.sort(key=lambda result: (-result[2], result[1]['mean']))
+    return results
+
+
+if __name__ == '__main__':
+    '''
+    This script searches over the robot's tuning parameters across a set of
+    mazes, e.g.
+
+        python sweep.py test_maze_*.txt --seeds 10 \\
+            --param max_actions=500,700,900 --param coverage=0.8,1.0
+
+    and prints the score distribution of every configuration, best first.
+    Configurations stopped early are listed after those that ran every round.
+    '''
+    parser = argparse.ArgumentParser(description='Sweep robot parameters.')
+    parser.add_argument('mazes', nargs='+', help='maze description files')
+    parser.add_argument('--param', action='append', default=[],
+                        help='robot parameter and candidate values, '
+                             'e.g. max_actions=500,700,900')
+    parser.add_argument('--samples', type=int, default=None,
+                        help='evaluate this many random configurations '
+                             'instead of the full grid')
+    parser.add_argument('--seeds', type=int, default=5,
+                        help='number of seeds (rounds) per maze')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='first seed; also seeds configuration sampling')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes')
+    parser.add_argument('--min-rounds', type=int, default=2,
+                        help='rounds to run before stopping configurations')
+    parser.add_argument('--cutoff', type=float, default=1.5,
+                        help='stop configurations whose mean score exceeds '
+                             'this multiple of the best mean')
+    args = parser.parse_args()
+
+    configs = make_configs(parse_grid(args.param), args.samples, args.seed)
+    seeds = range(args.seed, args.seed + args.seeds)
+    results = sweep(configs, args.mazes, seeds, args.workers,
+                    args.min_rounds, args.cutoff)
+
+    for config, summary, rounds in results:
+        print('{} rounds: {} trials: {trials} failures: {failures} '
+              'min: {min:.3f} median: {median:.3f} mean: {mean:.3f} '
+              'max: {max:.3f}'.format(config, rounds, **summary))
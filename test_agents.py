@@ -0,0 +1,147 @@
+from agents import serve_robot, decode, encode
+from robot import Robot
+from tester import run_trial
+import asyncio
+import agents
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+maze_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'test_maze_01.txt')
+
+
+async def flaky_robot(path, moves):
+    '''
+    Answers sessions like serve_robot, but hangs up after the given number of
+    moves.
+    '''
+    reader, writer = await asyncio.open_unix_connection(path)
+    robots = {}
+    while moves > 0:
+        line = await reader.readline()
+        if not line:
+            break
+        message = decode(line)
+        session = message['session']
+        if message['type'] == 'start':
+            robots[session] = Robot(message['maze_dim'], message['seed'],
+                                    **message['params'])
+        elif message['type'] == 'sense':
+            rotation, movement = robots[session].next_move(message['sensors'])
+            writer.write(encode({'type': 'move', 'session': session,
+                                 'rotation': rotation, 'movement': movement}))
+            await writer.drain()
+            moves -= 1
+    writer.close()
+
+
+class FailingRobot(Robot):
+    '''
+    Robot that raises on its first move of seed 2.
+    '''
+    def next_move(self, sensors):
+        if self.seed == 2:
+            raise ValueError('robot failed')
+        return Robot.next_move(self, sensors)
+
+
+async def restarting_robot(path):
+    '''
+    Serves sessions with FailingRobot, connecting again each time the agent
+    crashes, until the server has gone.
+    '''
+    while True:
+        try:
+            await serve_robot(path, FailingRobot)
+            return
+        except ValueError:
+            if not os.path.exists(path):
+                return
+        except OSError:
+            return
+
+
+class TesterServerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'maze.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def serve(self, trials, robots):
+        '''
+        Runs a tester server over the trials with the given agent coroutine
+        functions (robots) connecting to it, and returns the results.
+        '''
+        server = agents.TesterServer(trials, concurrency=4, timeout=10.0)
+        return self.serve_with(server, robots)
+
+    def serve_with(self, server, robots):
+        '''
+        Runs the given tester server with the agent coroutine functions
+        (robots) connecting to it, and returns the results.
+        '''
+        async def main():
+            serving = asyncio.ensure_future(server.serve(self.path))
+            while not os.path.exists(self.path):
+                await asyncio.sleep(0.01)
+            clients = [asyncio.ensure_future(robot(self.path))
+                       for robot in robots]
+            results = await asyncio.wait_for(serving, 60)
+            await asyncio.gather(*clients)
+            return results
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(main())
+
+    def expected_scores(self, seeds):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return dict((seed, run_trial(maze_file, seed)['score'])
+                        for seed in seeds)
+
+    def test_sessions_match_in_process_trials(self):
+        seeds = range(6)
+        results = self.serve([(maze_file, seed, {}) for seed in seeds],
+                             [serve_robot])
+        scores = dict((result['seed'], result['score']) for result in results)
+        self.assertEqual(scores, self.expected_scores(seeds))
+
+    def test_disconnected_agent_hands_trials_to_others(self):
+        seeds = range(12)
+        results = self.serve([(maze_file, seed, {}) for seed in seeds],
+                             [lambda path: flaky_robot(path, 300), serve_robot])
+        self.assertEqual([result for result in results if 'error' in result], [])
+        self.assertEqual(sorted(result['seed'] for result in results),
+                         list(seeds))
+        scores = dict((result['seed'], result['score']) for result in results)
+        self.assertEqual(scores, self.expected_scores(seeds))
+
+    def test_trial_crashing_agents_is_given_up(self):
+        seeds = range(6)
+        server = agents.TesterServer([(maze_file, seed, {}) for seed in seeds],
+                                     concurrency=4, timeout=10.0,
+                                     max_attempts=3)
+        results = self.serve_with(server, [restarting_robot])
+        self.assertEqual(sorted(result['seed'] for result in results),
+                         list(seeds))
+        failed = [result for result in results if 'error' in result]
+        self.assertEqual([result['seed'] for result in failed], [2])
+        self.assertIsNone(failed[0]['score'])
+        self.assertEqual(server.attempts[2], 3)
+        # Trials that shared an agent with seed 2 were each cut short at
+        # most once, before running alone.
+        self.assertEqual([attempts for seed, attempts in enumerate(server.attempts)
+                          if seed != 2 and attempts > 1], [])
+        scores = dict((result['seed'], result['score']) for result in results
+                      if result['seed'] != 2)
+        self.assertEqual(scores, self.expected_scores(seed for seed in seeds
+                                                      if seed != 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
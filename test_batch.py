@@ -0,0 +1,95 @@
+from tester import run_trial
+import batch
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+directory = os.path.dirname(os.path.abspath(__file__))
+maze_file = os.path.join(directory, 'test_maze_01.txt')
+
+
+def dying_trial(maze_file, seed, robot_params=None):
+    '''
+    Runs a trial like tester.run_trial, except that the worker process dies
+    outright on seed 2.
+    '''
+    if seed == 2:
+        os._exit(1)
+    return run_trial(maze_file, seed, robot_params=robot_params)
+
+
+class RunBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.results_file = os.path.join(self.directory, 'results.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_batch(self, trials):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return batch.run_batch(trials, self.results_file, workers=2)
+
+    def results(self):
+        with open(self.results_file) as f_in:
+            return dict((result['seed'], result)
+                        for result in map(json.loads, f_in))
+
+    def expected_scores(self, seeds):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return dict((seed, run_trial(maze_file, seed)['score'])
+                        for seed in seeds)
+
+    def test_failing_trial_is_recorded(self):
+        missing = os.path.join(self.directory, 'missing.txt')
+        trials = batch.work_list([maze_file], range(2), [{}])
+        trials += batch.work_list([missing], range(2, 3), [{}])
+        self.assertEqual(self.run_batch(trials), 3)
+
+        results = self.results()
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertIsNone(results[2]['score'])
+        self.assertIn('FileNotFoundError', results[2]['error'])
+        self.assertEqual(self.run_batch(trials), 0)
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork',
+                         'workers must inherit the patched trial function')
+    def test_dead_worker_does_not_stop_batch(self):
+        seeds = range(6)
+        trials = batch.work_list([maze_file], seeds, [{}])
+        run = batch.run_trial
+        batch.run_trial = dying_trial
+        try:
+            self.assertEqual(self.run_batch(trials), len(trials))
+        finally:
+            batch.run_trial = run
+
+        results = self.results()
+        self.assertEqual(sorted(results), list(seeds))
+        self.assertEqual(results[2]['error'], 'worker process died')
+        expected = self.expected_scores(seed for seed in seeds if seed != 2)
+        self.assertEqual(dict((seed, result['score'])
+                              for seed, result in results.items() if seed != 2),
+                         expected)
+        self.assertEqual(self.run_batch(trials), 0)
+
+    def test_resumed_from_another_directory(self):
+        cwd = os.getcwd()
+        try:
+            os.chdir(directory)
+            trials = batch.work_list(['test_maze_01.txt'], range(2), [{}])
+            self.assertEqual(self.run_batch(trials), 2)
+            os.chdir(self.directory)
+            trials = batch.work_list([maze_file], range(3), [{}])
+            self.assertEqual(self.run_batch(trials), 1)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+from catalog import Catalog
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+directory = os.path.dirname(os.path.abspath(__file__))
+
+
+class CatalogUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.mazes = os.path.join(self.directory, 'mazes')
+        os.mkdir(self.mazes)
+        for name in ('test_maze_01.txt', 'test_maze_02.txt'):
+            shutil.copy(os.path.join(directory, name), self.mazes)
+        self.bad = os.path.join(self.mazes, 'bad.txt')
+        self.write_bad('oops\n')
+        self.catalog = Catalog(os.path.join(self.directory, 'corpus.db'))
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.directory)
+
+    def write_bad(self, text):
+        with open(self.bad, 'w') as f_out:
+            f_out.write(text)
+
+    def update(self, paths):
+        '''
+        Updates the catalog, returning the number of files read and what was
+        printed.
+        '''
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            read = self.catalog.update(paths)
+        return read, output.getvalue()
+
+    def test_bad_paths_are_skipped(self):
+        missing = os.path.join(self.directory, 'missing.txt')
+        read, output = self.update([self.mazes, missing])
+        self.assertEqual(read, 2)
+        self.assertIn('Skipping ' + self.bad, output)
+        self.assertIn('Skipping ' + missing, output)
+        self.assertEqual(len(self.catalog.select()), 2)
+
+    def test_bad_files_are_read_again_only_once_changed(self):
+        self.update([self.mazes])
+        self.assertEqual(self.update([self.mazes]), (0, ''))
+
+        self.write_bad('still not a maze\n')
+        read, output = self.update([self.mazes])
+        self.assertIn('Skipping ' + self.bad, output)
+
+        shutil.copy(os.path.join(directory, 'test_maze_03.txt'), self.bad)
+        self.assertEqual(self.update([self.mazes]), (1, ''))
+        self.assertIn(self.bad, self.catalog.select())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+from maze import Maze
+import kernels
+import numpy as np
+import os
+import unittest
+
+directory = os.path.dirname(os.path.abspath(__file__))
+maze_files = [os.path.join(directory, 'test_maze_0{}.txt'.format(number))
+              for number in (1, 2, 3)]
+
+# Wall bit and (x, y) step of each heading, as in kernels.
+bits = (1, 2, 4, 8)
+steps_x = (0, 1, 0, -1)
+steps_y = (1, 0, -1, 0)
+
+
+@unittest.skipUnless(kernels.jit, 'Numba is not installed')
+class CompiledKernelsTest(unittest.TestCase):
+    '''
+    Checks that the kernels compiled by Numba give exactly the results of the
+    plain Python functions they are compiled from, on the shipped mazes.
+    '''
+    def setUp(self):
+        self.mazes = [Maze(maze_file) for maze_file in maze_files]
+
+    def cells(self, maze):
+        return [(x, y) for x in range(maze.dim) for y in range(maze.dim)]
+
+    def test_sense(self):
+        # _sense calls the walk compiled in its place, so the readings are
+        # also checked against the original walk.
+        walk = kernels._dist_to_wall.py_func
+        for maze in self.mazes:
+            for x, y in self.cells(maze):
+                for heading in range(4):
+                    expected = tuple(walk(maze.walls, x, y, bits[k],
+                                          steps_x[k], steps_y[k])
+                                     for k in ((heading + 3) % 4, heading,
+                                               (heading + 1) % 4))
+                    self.assertEqual(kernels._sense(maze.walls, x, y, heading),
+                                     expected)
+                    self.assertEqual(kernels.sense(maze.walls, x, y, heading),
+                                     expected)
+
+    def test_move(self):
+        for maze in self.mazes:
+            for x, y in self.cells(maze):
+                for k in range(4):
+                    for count in range(4):
+                        arguments = (maze.walls, x, y, bits[k], steps_x[k],
+                                     steps_y[k], count)
+                        self.assertEqual(kernels.move(*arguments),
+                                         kernels._move(*arguments))
+
+    def test_flood_fill(self):
+        for maze in self.mazes:
+            last = maze.dim - 1
+            for sources in (maze.goal_cells(), [(0, 0)], [(last, last)],
+                            [(0, last), (last, 0)]):
+                cells = np.array(sources, dtype=np.int64)
+                compiled = kernels.flood_fill(maze.walls, cells)
+                plain = kernels._flood_fill(maze.walls, cells)
+                self.assertEqual(compiled.dtype, plain.dtype)
+                self.assertTrue(np.array_equal(compiled, plain))
+
+    def test_distance_field(self):
+        for maze_file in maze_files:
+            compiled = Maze(maze_file)
+            plain = Maze(maze_file)
+            for sources in (compiled.goal_cells(), [(0, 0)]):
+                kernels.jit = False
+                try:
+                    expected = plain.distance_field(sources)
+                finally:
+                    kernels.jit = True
+                field = compiled.distance_field(sources)
+                self.assertEqual(field.dtype, expected.dtype)
+                self.assertTrue(np.array_equal(field, expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
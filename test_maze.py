@@ -0,0 +1,29 @@
+from maze import Maze
+import kernels
+import os
+import unittest
+
+maze_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'test_maze_01.txt')
+
+
+class DistanceFieldTest(unittest.TestCase):
+    def setUp(self):
+        self.jit = kernels.jit
+
+    def tearDown(self):
+        kernels.jit = self.jit
+
+    def test_sources_outside_maze_are_rejected(self):
+        for jit in set([False, kernels.jit]):
+            kernels.jit = jit
+            maze = Maze(maze_file)
+            for sources in ([(17, 3)], [(0, 12)], [(-1, 3)], [(5, 5), (3, -2)]):
+                with self.assertRaises(IndexError):
+                    maze.distance_field(sources)
+            self.assertEqual(maze._fields, {})
+            self.assertEqual(maze.distance_field([(0, 0)])[0, 0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
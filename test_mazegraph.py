@@ -0,0 +1,252 @@
+from maze import Maze
+from mazegraph import CorridorGraph, moves
+from robot import Robot
+from tester import Trial
+import contextlib
+import io
+import os
+import random
+import unittest
+
+directory = os.path.dirname(os.path.abspath(__file__))
+maze_files = [os.path.join(directory, 'test_maze_0{}.txt'.format(number))
+              for number in (1, 2, 3)]
+
+
+def maze_openings(maze):
+    '''
+    Returns the direction grid of a maze in the robot's (row, column) frame,
+    as a dictionary mapping each cell to its open directional bits.
+    '''
+    dim = maze.dim
+    return dict(((row, col), int(maze.walls[col, dim - 1 - row]))
+                for row in range(dim) for col in range(dim))
+
+
+def bfs_distances(openings, sources):
+    '''
+    Returns the number of steps from the nearest source to every cell reached
+    by a breadth-first search over the mapped cells. Unmapped cells are
+    reached but not expanded, as in CorridorGraph.
+    '''
+    distances = dict((tuple(cell), 0) for cell in sources)
+    queue = list(distances)
+    while queue:
+        cell = queue.pop(0)
+        for bit, step in moves.items():
+            if openings.get(cell, 0) & bit:
+                neighbour = (cell[0] + step[0], cell[1] + step[1])
+                if neighbour not in distances:
+                    distances[neighbour] = distances[cell] + 1
+                    queue.append(neighbour)
+    return distances
+
+
+def exploration_order(openings, start):
+    '''
+    Returns the cells reachable from start in the order a depth-first walk
+    first enters them, roughly the order in which a robot maps them.
+    '''
+    order = []
+    seen = set([start])
+    stack = [start]
+    while stack:
+        cell = stack.pop()
+        order.append(cell)
+        for bit, step in moves.items():
+            neighbour = (cell[0] + step[0], cell[1] + step[1])
+            if openings[cell] & bit and neighbour not in seen:
+                seen.add(neighbour)
+                stack.append(neighbour)
+    return order
+
+
+class CorridorGraphTest(unittest.TestCase):
+    # A corridor of three cells between two dead ends, all in row 0.
+    corridor = [((0, 0), 2), ((0, 1), 10), ((0, 2), 10), ((0, 3), 10),
+                ((0, 4), 8)]
+
+    def build(self, cells, pinned=()):
+        graph = CorridorGraph(pinned)
+        for cell, openings in cells:
+            graph.add_cell(cell, openings)
+            self.check(graph, dict(graph.openings), pinned or list(graph.edges))
+        return graph
+
+    def check(self, graph, openings, sources):
+        '''
+        Checks that the graph's distances match a plain breadth-first search
+        and that each cell records exactly the edges whose paths include it.
+        '''
+        self.assertEqual(graph.distances(sources),
+                         bfs_distances(openings, sources))
+        through = {}
+        for node, edges in graph.edges.items():
+            for bit, (end, path) in edges.items():
+                self.assertEqual(path[-1], end)
+                for cell in path:
+                    through.setdefault(cell, set()).add((node, bit))
+        self.assertEqual(dict((cell, edges) for cell, edges
+                              in graph.through.items() if edges), through)
+
+    def test_corridor_before_node(self):
+        graph = self.build(self.corridor[1:4] + [self.corridor[0],
+                                                 self.corridor[4]])
+        self.assertEqual(graph.node_count(), 2)
+        self.assertEqual(graph.edges[(0, 0)],
+                         {2: ((0, 4), [(0, 1), (0, 2), (0, 3), (0, 4)])})
+        self.assertEqual(graph.edges[(0, 4)],
+                         {8: ((0, 0), [(0, 3), (0, 2), (0, 1), (0, 0)])})
+
+    def test_node_before_corridor(self):
+        graph = self.build([self.corridor[0], self.corridor[4]] +
+                           self.corridor[1:4])
+        self.assertEqual(graph.node_count(), 2)
+        self.assertEqual(graph.edge_count(), 2)
+        self.assertEqual(graph.edges[(0, 0)][2][0], (0, 4))
+        self.assertEqual(graph.edges[(0, 4)][8][0], (0, 0))
+
+    def test_terminal_mapped_as_corridor(self):
+        graph = self.build(self.corridor[:1])
+        self.assertEqual(graph.edges[(0, 0)], {2: ((0, 1), [(0, 1)])})
+
+        graph.add_cell(*self.corridor[1])
+        self.assertEqual(graph.edges[(0, 0)], {2: ((0, 2), [(0, 1), (0, 2)])})
+        self.check(graph, dict(graph.openings), [(0, 0)])
+
+        # Mapping the far end of a corridor first still joins it up.
+        graph.add_cell(*self.corridor[3])
+        graph.add_cell(*self.corridor[2])
+        self.assertEqual(graph.edges[(0, 0)][2][0], (0, 4))
+        self.check(graph, dict(graph.openings), [(0, 0)])
+
+    def test_pinned_corridor_cells(self):
+        for order in (self.corridor, self.corridor[::-1]):
+            graph = self.build(order, pinned=[(0, 2)])
+            self.assertEqual(graph.node_count(), 3)
+            self.assertEqual(graph.edges[(0, 2)],
+                             {2: ((0, 4), [(0, 3), (0, 4)]),
+                              8: ((0, 0), [(0, 1), (0, 0)])})
+            self.assertEqual(graph.edges[(0, 0)][2][0], (0, 2))
+
+    def test_orders_match_breadth_first_search(self):
+        rng = random.Random(0)
+        for maze_file in maze_files:
+            maze = Maze(maze_file)
+            openings = maze_openings(maze)
+            goal = [(maze.dim // 2 - 1 + i, maze.dim // 2 - 1 + j)
+                    for i in (0, 1) for j in (0, 1)]
+            shuffled = sorted(openings)
+            rng.shuffle(shuffled)
+            orders = [sorted(openings), sorted(openings, reverse=True),
+                      shuffled, exploration_order(openings, (maze.dim - 1, 0))]
+
+            graphs = []
+            for order in orders:
+                graph = CorridorGraph(pinned=goal)
+                mapped = {}
+                for count, cell in enumerate(order):
+                    graph.add_cell(cell, openings[cell])
+                    mapped[cell] = openings[cell]
+                    if count % 7 == 0:
+                        self.check(graph, mapped, goal)
+                self.check(graph, mapped, goal)
+                graphs.append(graph)
+
+            for graph in graphs[1:]:
+                self.assertEqual(graph.edges, graphs[0].edges)
+
+
+def legacy_model(robot):
+    '''
+    Returns the model built by the robot's original breadth-first search,
+    which filled cells outwards from the goal area until it reached the start
+    cell.
+    '''
+    dim = robot.maze_dim
+    dir_grid = robot.dir_grid.to_list()
+    count_grid = robot.count_grid.to_list()
+    model = [[0] * dim for row in range(dim)]
+    trans = [[-1, 0], [0, 1], [1, 0], [0, -1]]
+
+    x, y = robot.goal_area
+    opened = [((x, y), 1), ((x + 1, y), 1), ((x, y - 1), 1),
+              ((x + 1, y - 1), 1)]
+    for (i, j), tune in opened:
+        model[i][j] = tune
+
+    while model[dim - 1][0] == 0 and opened:
+        location, tune = opened.pop(0)
+        actions = robot.act_legal(location)
+        for k, action in enumerate(['up', 'right', 'down', 'left']):
+            if action not in actions:
+                continue
+            if action != 'left' and count_grid[location[0]][location[1]] == 0:
+                continue
+            x2 = location[0] + trans[k][0]
+            y2 = location[1] + trans[k][1]
+            if model[x2][y2] == 0:
+                opened.append(((x2, y2), tune + 1))
+                model[x2][y2] = tune + 1
+    return dir_grid, model
+
+
+def route(dim, goal_cells, action):
+    '''
+    Returns the cells visited by following action(cell) from the start cell
+    to the goal area, stopping early at a cell without an action.
+    '''
+    trans = {'up': (-1, 0), 'right': (0, 1), 'down': (1, 0), 'left': (0, -1)}
+    cell = (dim - 1, 0)
+    cells = [cell]
+    while cell not in goal_cells and len(cells) <= dim * dim:
+        if action(cell) not in trans:
+            break
+        step = trans[action(cell)]
+        cell = (cell[0] + step[0], cell[1] + step[1])
+        cells.append(cell)
+    return cells
+
+
+class FinalRouteTest(unittest.TestCase):
+    def test_route_matches_legacy_model(self):
+        vals = [[1, 3, 5, 7, 9, 11, 13, 15],
+                [2, 3, 6, 7, 10, 11, 14, 15],
+                [4, 5, 6, 7, 12, 13, 14, 15],
+                [8, 9, 10, 11, 12, 13, 14, 15]]
+        possible = ['up', 'right', 'down', 'left']
+        trans = [[-1, 0], [0, 1], [1, 0], [0, -1]]
+
+        checked = 0
+        for maze_file in maze_files:
+            for seed in range(5):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    trial = Trial(maze_file)
+                    robot = Robot(trial.maze.dim, seed)
+                    while trial.run == 0:
+                        if trial.tick():
+                            trial.step(*robot.next_move(trial.sensing()))
+                if not robot.training:
+                    continue
+
+                dir_grid, model = legacy_model(robot)
+
+                def legacy_action(cell):
+                    i, j = cell
+                    action = 0
+                    for k in range(len(vals)):
+                        if dir_grid[i][j] in vals[k]:
+                            if model[i + trans[k][0]][j + trans[k][1]] == model[i][j] - 1:
+                                action = possible[k]
+                    return action
+
+                self.assertEqual(
+                    route(robot.maze_dim, robot.goal_cells,
+                          lambda cell: robot.action_grid[cell]),
+                    route(robot.maze_dim, robot.goal_cells, legacy_action))
+                checked += 1
+        self.assertTrue(checked > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
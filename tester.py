@@ -1,7 +1,10 @@
 from maze import Maze
 from robot import Robot
+import kernels
+import argparse
+import os
+import random
 import sys
-from showrobot import ShowRobot # FOR TESTING
 # global dictionaries for robot movement and sensing
 dir_sensors = {'u': ['l', 'u', 'r'], 'r': ['u', 'r', 'd'],
                'd': ['r', 'd', 'l'], 'l': ['d', 'l', 'u'],
@@ -9,6 +12,10 @@ dir_sensors = {'u': ['l', 'u', 'r'], 'r': ['u', 'r', 'd'],
                'down': ['r', 'd', 'l'], 'left': ['d', 'l', 'u']}
 dir_move = {'u': [0, 1], 'r': [1, 0], 'd': [0, -1], 'l': [-1, 0],
             'up': [0, 1], 'right': [1, 0], 'down': [0, -1], 'left': [-1, 0]}
+dir_bit = {'u': 1, 'r': 2, 'd': 4, 'l': 8,
+           'up': 1, 'right': 2, 'down': 4, 'left': 8}
+dir_index = {'u': 0, 'r': 1, 'd': 2, 'l': 3,
+             'up': 0, 'right': 1, 'down': 2, 'left': 3}
 dir_reverse = {'u': 'd', 'r': 'l', 'd': 'u', 'l': 'r',
                'up': 'd', 'right': 'l', 'down': 'u', 'left': 'r'}
 
@@ -16,109 +23,205 @@ dir_reverse = {'u': 'd', 'r': 'l', 'd': 'u', 'l': 'r',
 max_time = 1000
 train_score_mult = 1/30.
 
-if __name__ == '__main__':
+def silence_output():
     '''
-    This script tests a robot based on the code in robot.py on a maze given
-    as an argument when running the script.
+    Discards everything printed by the robot and tester from here on. Used as
+    the initializer of worker processes that run many trials.
     '''
+    sys.stdout = open(os.devnull, 'w')
 
-    # Create a maze based on input argument on command line.
-    testmaze = Maze( str(sys.argv[1]) )
 
-    # Intitialize a robot; robot receives info about maze dimensions.
-    testrobot = Robot(testmaze.dim)
-
-    # Record robot performance over two runs.
-    runtimes = []
-    total_time = 0
-    ###
-    sr = ShowRobot(str(sys.argv[1]))    # FOR TESTING
-    sr.start_maze() # FOR TESTING
-    show_robot_on = False # FOR TESTING
-    ### 
-    for run in range(2):
-        print "Starting run {}.".format(run)
-        
+class Trial(object):
+    '''
+    The tester's side of a trial on one maze: the robot's true position, the
+    clock and the times of the two runs. A driver repeatedly calls tick(),
+    passes sensing() to the robot and hands the robot's reply to step(),
+    until finished is set.
+    '''
+    def __init__(self, maze_file):
+        '''
+        maze_file: file path for the maze description (string)
+        '''
+        # Create a maze based on the maze file.
+        self.maze = Maze(maze_file)
+        self.maze_file = maze_file
+
+        # Record robot performance over two runs.
+        self.runtimes = []
+        self.total_time = 0
+        self.run = -1
+        self.finished = False
+        self.start_run()
+
+    def start_run(self):
+        '''
+        Moves on to the next run, or finishes the trial after the second.
+        '''
+        self.run += 1
+        if self.run == 2:
+            self.finished = True
+            return
+        print("Starting run {}.".format(self.run))
+
         # Set the robot in the start position. Note that robot position
         # parameters are independent of the robot itself.
-        robot_pos = {'location': [0, 0], 'heading': 'up'}
-
-        run_active = True
-        hit_goal = False
-        while run_active:
-            # check for end of time
-            total_time += 1
-            
-            if show_robot_on:   # FOR TESTING
-                sr.draw_robot_action(robot_pos['location']) # FOR TESTING
-            
-            if total_time > max_time:
-                run_active = False
-                print "Allotted time exceeded."
-                break
-
-            # provide robot with sensor information, get actions
-            sensing = [testmaze.dist_to_wall(robot_pos['location'], heading)
-                       for heading in dir_sensors[robot_pos['heading']]]
-            rotation, movement = testrobot.next_move(sensing)
-
-            # check for a reset
-            if (rotation, movement) == ('Reset', 'Reset'):
-                if run == 0 and hit_goal:
-                    run_active = False
-                    runtimes.append(total_time)
-                    show_robot_on = True # FOR TESTING
-                    print "Ending first run. Starting next run."
-                    break
-                elif run == 0 and not hit_goal:
-                    print "Cannot reset - robot has not hit goal yet."
-                    continue
-                else:
-                    print "Cannot reset on runs after the first."
-                    continue
-
-            # perform rotation
-            if rotation == -90:
-                robot_pos['heading'] = dir_sensors[robot_pos['heading']][0]
-            elif rotation == 90:
-                robot_pos['heading'] = dir_sensors[robot_pos['heading']][2]
-            elif rotation == 0:
-                pass
+        self.robot_pos = {'location': [0, 0], 'heading': 'up'}
+        self.hit_goal = False
+
+    def tick(self):
+        '''
+        Advances the clock by one time step. Returns False, and ends the run,
+        if the allotted time has been exceeded.
+        '''
+        # check for end of time
+        self.total_time += 1
+        if self.total_time > max_time:
+            print("Allotted time exceeded.")
+            self.start_run()
+            return False
+        return True
+
+    def sensing(self):
+        '''
+        Returns the distances to the walls on the robot's left, front and
+        right, as a list of three ints.
+        '''
+        x, y = self.robot_pos['location']
+        return list(kernels.sense(self.maze.walls, x, y,
+                                  dir_index[self.robot_pos['heading']]))
+
+    def step(self, rotation, movement):
+        '''
+        Carries out the rotation and movement returned by the robot, or a
+        ('Reset', 'Reset') request, and checks whether the goal was entered.
+        '''
+        robot_pos = self.robot_pos
+
+        # check for a reset
+        if (rotation, movement) == ('Reset', 'Reset'):
+            if self.run == 0 and self.hit_goal:
+                self.runtimes.append(self.total_time)
+                print("Ending first run. Starting next run.")
+                self.start_run()
+            elif self.run == 0 and not self.hit_goal:
+                print("Cannot reset - robot has not hit goal yet.")
+            else:
+                print("Cannot reset on runs after the first.")
+            return
+
+        # perform rotation
+        if rotation == -90:
+            robot_pos['heading'] = dir_sensors[robot_pos['heading']][0]
+        elif rotation == 90:
+            robot_pos['heading'] = dir_sensors[robot_pos['heading']][2]
+        elif rotation == 0:
+            pass
+        else:
+            print("Invalid rotation value, no rotation performed.")
+
+        # perform movement
+        if abs(movement) > 3:
+            print("Movement limited to three squares in a turn.")
+        movement = max(min(int(movement), 3), -3) # fix to range [-3, 3]
+        if movement:
+            if movement > 0:
+                heading = robot_pos['heading']
             else:
-                print "Invalid rotation value, no rotation performed."
-
-            # perform movement
-            if abs(movement) > 3:
-                print "Movement limited to three squares in a turn."
-            movement = max(min(int(movement), 3), -3) # fix to range [-3, 3]
-            while movement:
-                if movement > 0:
-                    if testmaze.is_permissible(robot_pos['location'], robot_pos['heading']):
-                        robot_pos['location'][0] += dir_move[robot_pos['heading']][0]
-                        robot_pos['location'][1] += dir_move[robot_pos['heading']][1]
-                        movement -= 1
-                    else:
-                        print "Movement stopped by wall."
-                        movement = 0
-                else:
-                    rev_heading = dir_reverse[robot_pos['heading']]
-                    if testmaze.is_permissible(robot_pos['location'], rev_heading):
-                        robot_pos['location'][0] += dir_move[rev_heading][0]
-                        robot_pos['location'][1] += dir_move[rev_heading][1]
-                        movement += 1
-                    else:
-                        print "Movement stopped by wall."
-                        movement = 0
-
-            # check for goal entered
-            goal_bounds = [testmaze.dim/2 - 1, testmaze.dim/2]
-            if robot_pos['location'][0] in goal_bounds and robot_pos['location'][1] in goal_bounds:
-                hit_goal = True
-                if run != 0:
-                    runtimes.append(total_time - sum(runtimes))
-                    run_active = False
-                    print "Goal found; run {} completed!".format(run)
+                heading = dir_reverse[robot_pos['heading']]
+            x, y, stopped = kernels.move(self.maze.walls,
+                                         robot_pos['location'][0],
+                                         robot_pos['location'][1],
+                                         dir_bit[heading],
+                                         dir_move[heading][0],
+                                         dir_move[heading][1],
+                                         abs(movement))
+            robot_pos['location'][0] = x
+            robot_pos['location'][1] = y
+            if stopped:
+                print("Movement stopped by wall.")
+
+        # check for goal entered
+        goal_bounds = [self.maze.dim // 2 - 1, self.maze.dim // 2]
+        if robot_pos['location'][0] in goal_bounds and robot_pos['location'][1] in goal_bounds:
+            self.hit_goal = True
+            if self.run != 0:
+                self.runtimes.append(self.total_time - sum(self.runtimes))
+                print("Goal found; run {} completed!".format(self.run))
+                self.start_run()
+
+    def score(self):
+        '''
+        Returns the score of the trial, or None if the robot did not complete
+        both runs.
+        '''
+        if len(self.runtimes) == 2:
+            return self.runtimes[1] + train_score_mult*self.runtimes[0]
+        return None
+
+
+def run_trial(maze_file, seed, show_robot=False, robot_params=None):
+    '''
+    Tests a robot based on the code in robot.py on the maze in maze_file, with
+    the robot's random number generator seeded by seed. The same maze and
+    seed always give the same trial.
+
+    If show_robot is set, the maze is drawn with turtle and the robot's path
+    is traced during the final run. robot_params holds extra keyword
+    arguments for the Robot, e.g. {'max_actions': 500}.
+
+    Returns a dictionary with the maze, the seed, the robot parameters, the
+    recorded run times and the score, which is None if the robot did not
+    complete both runs.
+    '''
+    trial = Trial(maze_file)
+
+    # Intitialize a robot; robot receives info about maze dimensions.
+    robot_params = dict(robot_params or {})
+    testrobot = Robot(trial.maze.dim, seed, **robot_params)
+
+    if show_robot:
+        from showrobot import ShowRobot
+        sr = ShowRobot(maze_file)
+        sr.start_maze()
+
+    while not trial.finished:
+        if show_robot and trial.run == 1:
+            sr.draw_robot_action(trial.robot_pos['location'])
+        if not trial.tick():
+            continue
+
+        # provide robot with sensor information, get actions
+        rotation, movement = testrobot.next_move(trial.sensing())
+        trial.step(rotation, movement)
 
     # Report score if robot is successful.
-    if len(runtimes) == 2:
-        print "Task complete! Score: {:4.3f}".format(runtimes[1] + train_score_mult*runtimes[0])
\ No newline at end of file
+    score = trial.score()
+    if score is not None:
+        print("Task complete! Score: {:4.3f}".format(score))
+
+    return {'maze': maze_file, 'seed': seed, 'params': robot_params,
+            'runtimes': trial.runtimes, 'score': score}
+
+
+if __name__ == '__main__':
+    '''
+    This script tests a robot based on the code in robot.py on a maze given
+    as an argument when running the script. A seed may be given to fix the
+    robot's random choices; otherwise one is drawn and reported, so that the
+    trial can be re-run with replay.py.
+    '''
+    parser = argparse.ArgumentParser(description='Test the robot on a maze.')
+    parser.add_argument('maze', help='maze description file')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for the robot random number generator')
+    parser.add_argument('--show', action='store_true',
+                        help='draw the maze and the robot path with turtle')
+    args = parser.parse_args()
+
+    seed = args.seed
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+
+    results = run_trial(args.maze, seed, show_robot=args.show)
+    print("Maze: {} Seed: {} Run times: {} Score: {}".format(
+        results['maze'], results['seed'], results['runtimes'], results['score']))
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+class TiledGrid(object):
+    '''
+    Square grid of values stored as fixed-size tiles, each allocated only when
+    a value inside it is first set. Reading a cell of a tile that has not been
+    allocated returns the default value without allocating it, so a robot
+    that explores a fraction of a very large maze only pays for the tiles it
+    has touched.
+
+    Cells are indexed as grid[x, y]. As with nested lists, negative indices
+    count back from the end of an axis.
+    '''
+    def __init__(self, dim, dtype=int, default=0, tile_size=64):
+        '''
+        dim: number of cells along each side of the grid (int)
+        dtype: numpy type of the values held in the grid
+        default: value of every cell until it is set
+        tile_size: number of cells along each side of a tile (int)
+        '''
+        self.dim = dim
+        self.dtype = dtype
+        self.default = default
+        self.tile_size = tile_size
+        self.tiles = {}
+
+    def _locate(self, cell):
+        '''
+        Returns the key of the tile holding the cell and the cell's position
+        within that tile.
+        '''
+        x, y = cell
+        if x < 0:
+            x += self.dim
+        if y < 0:
+            y += self.dim
+        if not (0 <= x < self.dim and 0 <= y < self.dim):
+            raise IndexError('Cell {} is outside the grid!'.format(cell))
+        tile_x, x = divmod(x, self.tile_size)
+        tile_y, y = divmod(y, self.tile_size)
+        return (tile_x, tile_y), (x, y)
+
+    def __getitem__(self, cell):
+        key, offset = self._locate(cell)
+        tile = self.tiles.get(key)
+        if tile is None:
+            return self.default
+        return tile[offset]
+
+    def __setitem__(self, cell, value):
+        key, offset = self._locate(cell)
+        tile = self.tiles.get(key)
+        if tile is None:
+            # Tiles on the far edges are cut down to the size of the grid.
+            shape = (min(self.tile_size, self.dim - key[0] * self.tile_size),
+                     min(self.tile_size, self.dim - key[1] * self.tile_size))
+            tile = np.full(shape, self.default, dtype=self.dtype)
+            self.tiles[key] = tile
+        tile[offset] = value
+
+    def tile_count(self):
+        '''
+        Returns the number of tiles allocated so far.
+        '''
+        return len(self.tiles)
+
+    def to_list(self):
+        '''
+        Returns the whole grid as nested lists, indexed [x][y].
+        '''
+        rows = [[self.default] * self.dim for x in range(self.dim)]
+        for (tile_x, tile_y), tile in self.tiles.items():
+            x0 = tile_x * self.tile_size
+            y0 = tile_y * self.tile_size
+            for i, row in enumerate(tile.tolist()):
+                rows[x0 + i][y0:y0 + len(row)] = row
+        return rows
+
+    def __repr__(self):
+        # Small grids print in full, as the nested lists they replace.
+        if self.dim <= self.tile_size:
+            return repr(self.to_list())
+        return 'TiledGrid(dim={}, tile_size={}, tiles={})'.format(
+            self.dim, self.tile_size, self.tile_count())